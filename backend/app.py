@@ -1,11 +1,12 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import os
 from dotenv import load_dotenv
-from supabase import create_client, Client
 from emotion_detector import EmotionDetector
 from response_generator import ResponseGenerator
 from voice_analyzer import VoiceAnalyzer
+from data_access import DataAccess
+from journal import build_journal_entry, count_emotions
+from emotion_export import CONTENT_TYPE, choose_encoding, encode_emotion_history, stream_compressed
 # Add these imports at the top of app.py (if not already present)
 import traceback
 import logging
@@ -23,9 +24,8 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)
 
-supabase_url = os.getenv('VITE_SUPABASE_URL')
-supabase_key = os.getenv('VITE_SUPABASE_ANON_KEY')
-supabase: Client = create_client(supabase_url, supabase_key)
+# one Supabase client + connection pool per worker process (see data_access.py)
+db = DataAccess.from_env()
 
 emotion_detector = EmotionDetector()
 response_generator = ResponseGenerator()  # now uses Gemini
@@ -139,7 +139,7 @@ def combined_analysis():
                 'input_text': text,
                 'ai_response': ai_response
             }
-            supabase.table('emotion_logs').insert(log_data).execute()
+            db.insert_emotion_log(log_data)
 
         return jsonify({
             'emotion': combined_emotion['emotion'],
@@ -159,19 +159,9 @@ def get_emotion_stats():
         if not user_id:
             return jsonify({'error': 'User ID is required'}), 400
 
-        response = supabase.table('emotion_logs')\
-            .select('emotion_type, confidence_score, created_at')\
-            .eq('user_id', user_id)\
-            .gte('created_at', f'now() - interval \'{days} days\'')\
-            .order('created_at', desc=False)\
-            .execute()
+        logs = db.get_emotion_logs(user_id, days)
 
-        logs = response.data
-
-        emotion_counts = {}
-        for log in logs:
-            emotion = log['emotion_type']
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
+        emotion_counts = count_emotions(logs)
 
         return jsonify({
             'logs': logs,
@@ -182,6 +172,29 @@ def get_emotion_stats():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/emotion-stats/export', methods=['GET'])
+def export_emotion_history():
+    try:
+        user_id = request.args.get('user_id')
+        days = int(request.args.get('days', 7))
+        points = request.args.get('points', type=int)
+
+        if not user_id:
+            return jsonify({'error': 'User ID is required'}), 400
+
+        logs = db.get_emotion_logs(user_id, days)
+        payload = encode_emotion_history(logs, points=points)
+
+        encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+        headers = {'Vary': 'Accept-Encoding'}
+        if encoding:
+            headers['Content-Encoding'] = encoding
+
+        return Response(stream_compressed(payload, encoding), mimetype=CONTENT_TYPE, headers=headers)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/journal-summary', methods=['POST'])
 def generate_journal_summary():
     try:
@@ -192,39 +205,29 @@ def generate_journal_summary():
         if not user_id or not date:
             return jsonify({'error': 'User ID and date are required'}), 400
 
-        response = supabase.table('emotion_logs')\
-            .select('emotion_type, input_text, ai_response, created_at')\
-            .eq('user_id', user_id)\
-            .gte('created_at', f'{date} 00:00:00')\
-            .lte('created_at', f'{date} 23:59:59')\
-            .execute()
+        # summaries written after the day closed (e.g. by journal_scheduler.py)
+        # are complete; anything else may be partial and is regenerated
+        if not data.get('refresh'):
+            entry = db.get_final_journal_entry(user_id, date)
+            if entry and entry.get('mood_summary'):
+                return jsonify({
+                    'summary': entry['mood_summary'],
+                    'dominant_emotion': entry['dominant_emotion'],
+                    'precomputed': True
+                }), 200
 
-        logs = response.data
+        logs = db.get_logs_for_day(user_id, date)
 
         if not logs:
             return jsonify({'summary': 'No activity recorded for this day.', 'dominant_emotion': 'neutral'}), 200
 
-        summary = response_generator.generate_daily_summary(logs)
-
-        emotion_counts = {}
-        for log in logs:
-            emotion = log['emotion_type']
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-
-        dominant_emotion = max(emotion_counts, key=emotion_counts.get)
-
-        journal_data = {
-            'user_id': user_id,
-            'entry_date': date,
-            'mood_summary': summary,
-            'dominant_emotion': dominant_emotion
-        }
+        journal_data, emotion_counts = build_journal_entry(response_generator, user_id, date, logs)
 
-        supabase.table('journal_entries').upsert(journal_data).execute()
+        db.upsert_journal_entry(journal_data)
 
         return jsonify({
-            'summary': summary,
-            'dominant_emotion': dominant_emotion,
+            'summary': journal_data['mood_summary'],
+            'dominant_emotion': journal_data['dominant_emotion'],
             'emotion_counts': emotion_counts
         }), 200
 
@@ -0,0 +1,261 @@
+# data_access.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date as date_type, timedelta
+
+import httpx
+from supabase import create_client, Client
+from supabase.lib.client_options import ClientOptions
+
+
+def _env_float(name, default):
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return float(default)
+
+
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return int(default)
+
+
+class _Flight:
+    """A read that is currently in progress; followers wait on it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class DataAccess:
+    """Supabase access shared by all routes of one worker process.
+
+    Every worker gets its own client and HTTP connection pool (created lazily
+    after fork), identical concurrent reads share a single request, and reads
+    are cached for a short TTL in a bounded LRU. The cache is per process:
+    writes made through this object clear it, but writes from other workers
+    or straight from the frontend only show up once the TTL expires.
+    """
+
+    def __init__(self, url, key, max_connections=10, max_keepalive=5,
+                 timeout=10.0, connect_timeout=3.0, cache_ttl=5.0,
+                 cache_max_entries=1024):
+        self.url = url
+        self.key = key
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.cache_ttl = cache_ttl
+        self.cache_max_entries = cache_max_entries
+        self._pid = None
+        self._reset()
+
+    @classmethod
+    def from_env(cls, key=None, cache_ttl=None):
+        return cls(
+            url=os.getenv('VITE_SUPABASE_URL'),
+            key=key or os.getenv('VITE_SUPABASE_ANON_KEY'),
+            max_connections=_env_int('SUPABASE_POOL_MAX_CONNECTIONS', 10),
+            max_keepalive=_env_int('SUPABASE_POOL_MAX_KEEPALIVE', 5),
+            timeout=_env_float('SUPABASE_TIMEOUT_SECONDS', 10.0),
+            connect_timeout=_env_float('SUPABASE_CONNECT_TIMEOUT_SECONDS', 3.0),
+            cache_ttl=(cache_ttl if cache_ttl is not None
+                       else _env_float('SUPABASE_CACHE_TTL_SECONDS', 5.0)),
+            cache_max_entries=_env_int('SUPABASE_CACHE_MAX_ENTRIES', 1024),
+        )
+
+    def _reset(self):
+        # Locks and connections must never be shared across a fork
+        self._lock = threading.Lock()
+        self._client = None
+        self._cache = OrderedDict()
+        self._flights = {}
+        self._generations = {}
+
+    def _http_timeout(self):
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
+
+    def client(self) -> Client:
+        if self._pid != os.getpid():
+            self._reset()
+            self._pid = os.getpid()
+
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        return self._client
+
+    def _create_client(self) -> Client:
+        options = ClientOptions(postgrest_client_timeout=self._http_timeout())
+        client = create_client(self.url, self.key, options=options)
+
+        # Swap postgrest's default session for one with explicit pool limits,
+        # keeping the base URL and auth headers it was configured with.
+        default_session = client.postgrest.session
+        client.postgrest.session = httpx.Client(
+            base_url=default_session.base_url,
+            headers=default_session.headers,
+            timeout=self._http_timeout(),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+            ),
+            follow_redirects=True,
+        )
+        default_session.close()
+        return client
+
+    # ----- caching / coalescing -----
+
+    def _read(self, table, user_id, key, fetch):
+        """Run ``fetch`` once for all concurrent callers of ``key``.
+
+        Results are cached for ``cache_ttl`` seconds unless a write for the
+        same (table, user) happened while the fetch was in flight.
+        """
+        self.client()
+        scope = (table, user_id)
+        cache_key = (table, user_id) + tuple(key)
+
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached:
+                if cached[0] > time.monotonic():
+                    self._cache.move_to_end(cache_key)
+                    return cached[1]
+                del self._cache[cache_key]
+
+            flight = self._flights.get(cache_key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[cache_key] = flight
+                generation = self._generations.get(scope, 0)
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fetch()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                # a write may already have replaced this flight with a newer one
+                if self._flights.get(cache_key) is flight:
+                    del self._flights[cache_key]
+                if (flight.error is None and self.cache_ttl > 0
+                        and self._generations.get(scope, 0) == generation):
+                    self._store(cache_key, flight.result)
+            flight.done.set()
+
+        return flight.result
+
+    def _store(self, cache_key, result):
+        # caller holds self._lock
+        now = time.monotonic()
+        for expired in [k for k, (expires, _) in self._cache.items() if expires <= now]:
+            del self._cache[expired]
+        self._cache[cache_key] = (now + self.cache_ttl, result)
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > self.cache_max_entries:
+            self._cache.popitem(last=False)
+
+    def invalidate(self, table, user_id):
+        with self._lock:
+            scope = (table, user_id)
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+            for cache_key in [k for k in self._cache if k[:2] == scope]:
+                del self._cache[cache_key]
+            # reads started after this write must not join a pre-write fetch
+            for cache_key in [k for k in self._flights if k[:2] == scope]:
+                del self._flights[cache_key]
+
+    # ----- emotion_logs -----
+
+    def get_emotion_logs(self, user_id, days):
+        def fetch():
+            return self.client().table('emotion_logs')\
+                .select('emotion_type, confidence_score, created_at')\
+                .eq('user_id', user_id)\
+                .gte('created_at', f'now() - interval \'{days} days\'')\
+                .order('created_at', desc=False)\
+                .execute().data
+
+        return self._read('emotion_logs', user_id, ('stats', days), fetch)
+
+    def get_logs_for_day(self, user_id, date):
+        def fetch():
+            return self.client().table('emotion_logs')\
+                .select('emotion_type, input_text, ai_response, created_at')\
+                .eq('user_id', user_id)\
+                .gte('created_at', f'{date} 00:00:00')\
+                .lte('created_at', f'{date} 23:59:59')\
+                .execute().data
+
+        return self._read('emotion_logs', user_id, ('day', date), fetch)
+
+    def get_active_user_ids(self, date, page_size=1000):
+        """Distinct users with at least one emotion log on ``date`` (uncached).
+
+        Uses the ``active_user_ids`` SQL function, which returns distinct ids
+        in ``user_id`` order after a cursor. Paging continues from the last id
+        until an empty page, so a PostgREST ``max-rows`` below ``page_size``
+        only costs extra round trips.
+        """
+        user_ids = []
+        after = None
+        while True:
+            rows = self.client().rpc('active_user_ids', {
+                'day': date,
+                'after_user_id': after,
+                'max_count': page_size,
+            }).execute().data
+            if not rows:
+                return user_ids
+            user_ids.extend(row['user_id'] for row in rows)
+            after = user_ids[-1]
+
+    def insert_emotion_log(self, log_data):
+        try:
+            return self.client().table('emotion_logs').insert(log_data).execute().data
+        finally:
+            self.invalidate('emotion_logs', log_data.get('user_id'))
+
+    # ----- journal_entries -----
+
+    def get_final_journal_entry(self, user_id, date):
+        """The entry for ``date`` if its summary was generated after the day ended."""
+        day_end = (date_type.fromisoformat(date) + timedelta(days=1)).isoformat()
+
+        def fetch():
+            rows = self.client().table('journal_entries')\
+                .select('entry_date, mood_summary, dominant_emotion')\
+                .eq('user_id', user_id)\
+                .eq('entry_date', date)\
+                .gte('summary_generated_at', f'{day_end} 00:00:00')\
+                .limit(1)\
+                .execute().data
+            return rows[0] if rows else None
+
+        return self._read('journal_entries', user_id, ('final', date), fetch)
+
+    def upsert_journal_entry(self, journal_data):
+        try:
+            return self.client().table('journal_entries')\
+                .upsert(journal_data, on_conflict='user_id,entry_date')\
+                .execute().data
+        finally:
+            self.invalidate('journal_entries', journal_data.get('user_id'))
@@ -0,0 +1,168 @@
+# emotion_export.py
+#
+# Compact columnar encoding of a user's emotion history for the dashboard.
+# Decoded by src/lib/emotionExport.ts. All integers are little-endian:
+#
+#   offset  size  field
+#   0       4     magic b"MCE1"
+#   4       1     format version (1)
+#   5       1     k = number of emotion labels
+#   6       2     reserved
+#   8       4     n = number of points
+#   12      4     total_logs before downsampling
+#   16      8     base timestamp, float64 epoch seconds
+#   24      4*k   uint32 count per label (over all logs, not just points)
+#   ...     4*n   uint32 seconds since the previous point (first is 0)
+#   ...     n     uint8 label code per point
+#   ...     n     uint8 confidence per point, quantized to 0..255
+#   ...           k labels, each a uint8 length + utf-8 bytes
+import re
+import struct
+import zlib
+from datetime import datetime, timezone
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MAGIC = b"MCE1"
+VERSION = 1
+CONTENT_TYPE = "application/x-mindcare-emotions"
+CHUNK_SIZE = 64 * 1024
+
+_FRACTION = re.compile(r"\.(\d+)")
+
+
+def _epoch_seconds(created_at):
+    # Postgres may return 0-6 fractional digits, which fromisoformat
+    # only accepts on Python 3.11+; normalize to microseconds first.
+    ts = created_at.replace("Z", "+00:00").replace(" ", "T", 1)
+    ts = _FRACTION.sub(lambda m: "." + m.group(1)[:6].ljust(6, "0"), ts, count=1)
+    parsed = datetime.fromisoformat(ts)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _quantize(confidence):
+    return int(round(min(max(float(confidence or 0), 0.0), 1.0) * 255))
+
+
+def downsample(points, target):
+    """Reduce ``(epoch, emotion, confidence)`` points to about ``target``.
+
+    Consecutive points are grouped into equal-sized buckets; each bucket keeps
+    its first timestamp, its most frequent emotion and the mean confidence.
+    ``None`` keeps every point; ``0`` drops the series (totals only).
+    """
+    if target is None or len(points) <= target:
+        return points
+    if target <= 0:
+        return []
+
+    reduced = []
+    size = len(points) / target
+    for i in range(target):
+        bucket = points[int(i * size):int((i + 1) * size)]
+        if not bucket:
+            continue
+        counts = {}
+        for _, emotion, _ in bucket:
+            counts[emotion] = counts.get(emotion, 0) + 1
+        emotion = max(counts, key=counts.get)
+        confidence = sum(c for _, _, c in bucket) / len(bucket)
+        reduced.append((bucket[0][0], emotion, confidence))
+    return reduced
+
+
+def encode_emotion_history(logs, points=None):
+    """Encode emotion_logs rows (ordered by created_at) into the format above."""
+    emotion_counts = {}
+    series = []
+    for log in logs:
+        emotion = log['emotion_type']
+        emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
+        series.append((_epoch_seconds(log['created_at']), emotion, float(log['confidence_score'] or 0)))
+
+    series = downsample(series, points)
+
+    labels = list(emotion_counts)
+    if len(labels) > 255:
+        raise ValueError("Too many distinct emotion labels to encode")
+    codes = {label: i for i, label in enumerate(labels)}
+
+    base = series[0][0] if series else 0.0
+    deltas = []
+    previous = base
+    for epoch, _, _ in series:
+        deltas.append(max(int(round(epoch - previous)), 0))
+        previous += deltas[-1]
+
+    n = len(series)
+    parts = [
+        struct.pack("<4sBBHIId", MAGIC, VERSION, len(labels), 0, n, len(logs), base),
+        struct.pack(f"<{len(labels)}I", *(emotion_counts[label] for label in labels)),
+        struct.pack(f"<{n}I", *deltas),
+        bytes(codes[emotion] for _, emotion, _ in series),
+        bytes(_quantize(confidence) for _, _, confidence in series),
+    ]
+    for label in labels:
+        encoded = label.encode("utf-8")[:255]
+        parts.append(struct.pack("<B", len(encoded)) + encoded)
+    return b"".join(parts)
+
+
+def _parse_accept_encoding(header):
+    weights = {}
+    for part in (header or "").split(","):
+        coding, *params = [piece.strip() for piece in part.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding.lower()] = q
+    return weights
+
+
+def choose_encoding(accept_encoding):
+    """Best supported coding the client accepts, or None for identity.
+
+    Honours q-values (``q=0`` refuses a coding) and ``*`` for codings the
+    header does not name; brotli wins ties when it is installed.
+    """
+    weights = _parse_accept_encoding(accept_encoding)
+    supported = (["br"] if brotli is not None else []) + ["gzip"]
+
+    best, best_q = None, 0.0
+    for coding in supported:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def stream_compressed(payload, encoding):
+    """Yield ``payload`` in chunks, compressed with ``encoding`` if given."""
+    if encoding == "br":
+        compressor = brotli.Compressor()
+        compress, flush = compressor.process, compressor.finish
+    elif encoding == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        compress, flush = compressor.compress, compressor.flush
+    else:
+        compress, flush = (lambda chunk: chunk), (lambda: b"")
+
+    for start in range(0, len(payload), CHUNK_SIZE):
+        chunk = compress(payload[start:start + CHUNK_SIZE])
+        if chunk:
+            yield chunk
+    tail = flush()
+    if tail:
+        yield tail
@@ -0,0 +1,43 @@
+# journal.py
+import logging
+from datetime import datetime, timezone
+
+
+def count_emotions(logs):
+    emotion_counts = {}
+    for log in logs:
+        emotion = log['emotion_type']
+        emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
+    return emotion_counts
+
+
+def build_journal_entry(response_generator, user_id, date, logs, strict=False):
+    """Summarize one user's day; shared by the endpoint and the scheduler.
+
+    Only a real Gemini summary gets ``summary_generated_at``. Without
+    ``strict`` a failure falls back to canned text that is left unstamped,
+    so it is never served as final and the next request retries Gemini;
+    with ``strict`` the error is raised instead.
+    """
+    try:
+        summary = response_generator.generate_daily_summary(logs, strict=True)
+        generated_at = datetime.now(timezone.utc).isoformat()
+    except Exception as e:
+        if strict:
+            raise
+        logging.error("Daily summary generation failed, using fallback: %s", e)
+        summary = response_generator.fallback_daily_summary(logs)
+        generated_at = None
+
+    emotion_counts = count_emotions(logs)
+    dominant_emotion = max(emotion_counts, key=emotion_counts.get)
+
+    journal_data = {
+        'user_id': user_id,
+        'entry_date': date,
+        'mood_summary': summary,
+        'dominant_emotion': dominant_emotion,
+        # entries generated after the day closed are final (see get_final_journal_entry)
+        'summary_generated_at': generated_at
+    }
+    return journal_data, emotion_counts
@@ -0,0 +1,150 @@
+# journal_scheduler.py
+#
+# Precomputes journal summaries so /api/journal-summary can serve stored
+# entries instead of scanning emotion_logs and calling Gemini on demand.
+#
+#   python journal_scheduler.py                      # summarize yesterday once
+#   python journal_scheduler.py --date 2025-11-13    # summarize a given day
+#   python journal_scheduler.py --daemon --at 00:15  # run nightly (UTC)
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+from data_access import DataAccess
+from journal import build_journal_entry
+from response_generator import ResponseGenerator
+
+logger = logging.getLogger("journal_scheduler")
+
+
+class RateLimiter:
+    """Spaces calls at least ``1 / per_second`` seconds apart across threads."""
+
+    def __init__(self, per_second):
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class JournalScheduler:
+    def __init__(self, db, response_generator, concurrency=4, rate_per_second=1.0):
+        self.db = db
+        self.response_generator = response_generator
+        self.concurrency = max(1, concurrency)
+        self.rate_limiter = RateLimiter(rate_per_second)
+
+    def summarize_user(self, user_id, date):
+        logs = self.db.get_logs_for_day(user_id, date)
+        if not logs:
+            return False
+
+        self.rate_limiter.wait()
+        # strict: a Gemini failure counts as failed instead of storing fallback text
+        journal_data, _ = build_journal_entry(self.response_generator, user_id, date, logs,
+                                              strict=True)
+        self.db.upsert_journal_entry(journal_data)
+        return True
+
+    def run_for_date(self, date):
+        """Summarize every user active on ``date`` and return run metrics."""
+        started = time.monotonic()
+        user_ids = self.db.get_active_user_ids(date)
+        stats = {'date': date, 'users': len(user_ids), 'succeeded': 0,
+                 'skipped': 0, 'failed': 0}
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {pool.submit(self.summarize_user, user_id, date): user_id
+                       for user_id in user_ids}
+            for future in as_completed(futures):
+                try:
+                    stats['succeeded' if future.result() else 'skipped'] += 1
+                except Exception as e:
+                    stats['failed'] += 1
+                    logger.error("Journal summary failed for user %s on %s: %s",
+                                 futures[future], date, e)
+
+        elapsed = time.monotonic() - started
+        day_end = datetime.strptime(date, '%Y-%m-%d').replace(tzinfo=timezone.utc) + timedelta(days=1)
+        stats['elapsed_seconds'] = round(elapsed, 2)
+        stats['users_per_second'] = round(len(user_ids) / elapsed, 2) if elapsed > 0 else 0.0
+        # how long after the day closed its summaries became available
+        stats['lag_seconds'] = round((datetime.now(timezone.utc) - day_end).total_seconds(), 1)
+
+        log = logger.warning if stats['failed'] else logger.info
+        log("Journal run %(date)s: %(users)d users, %(succeeded)d written, "
+            "%(skipped)d skipped, %(failed)d failed in %(elapsed_seconds)ss "
+            "(%(users_per_second)s users/s, lag %(lag_seconds)ss)", stats)
+        return stats
+
+    def run_forever(self, at="00:15"):
+        """Each day at ``at`` (HH:MM, UTC), summarize the day that just ended."""
+        hour, minute = (int(part) for part in at.split(':'))
+        while True:
+            now = datetime.now(timezone.utc)
+            next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if next_run <= now:
+                next_run += timedelta(days=1)
+            time.sleep((next_run - now).total_seconds())
+
+            target = (next_run - timedelta(days=1)).date().isoformat()
+            try:
+                self.run_for_date(target)
+            except Exception as e:
+                logger.error("Journal run for %s aborted: %s", target, e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute daily journal summaries.")
+    parser.add_argument('--date', help="day to summarize (YYYY-MM-DD, default: yesterday UTC)")
+    parser.add_argument('--daemon', action='store_true', help="keep running and summarize nightly")
+    parser.add_argument('--at', default=os.getenv('JOURNAL_SCHEDULE_AT', '00:15'),
+                        help="daily run time in UTC for --daemon (HH:MM)")
+    parser.add_argument('--concurrency', type=int,
+                        default=int(os.getenv('JOURNAL_CONCURRENCY', 4)))
+    parser.add_argument('--rate', type=float,
+                        default=float(os.getenv('JOURNAL_RATE_PER_SECOND', 1.0)),
+                        help="max Gemini summary calls per second")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    # RLS hides other users' logs from the anon key, which would make every
+    # run look like a successful run with no active users
+    service_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+    if not service_key:
+        logger.error("SUPABASE_SERVICE_ROLE_KEY is required to run the journal scheduler")
+        sys.exit(2)
+
+    # each user's day is read once per run, so caching would only hold memory
+    db = DataAccess.from_env(key=service_key, cache_ttl=0)
+    scheduler = JournalScheduler(db, ResponseGenerator(),
+                                 concurrency=args.concurrency, rate_per_second=args.rate)
+
+    if args.daemon:
+        scheduler.run_forever(at=args.at)
+    else:
+        date = args.date or (datetime.now(timezone.utc) - timedelta(days=1)).date().isoformat()
+        stats = scheduler.run_for_date(date)
+        raise SystemExit(1 if stats['failed'] else 0)
+
+
+if __name__ == '__main__':
+    load_dotenv()
+    main()
@@ -87,7 +87,9 @@ Guidelines:
             print(f"Gemini Error: {e}")
             return self.fallback_responses.get(emotion, "I'm here to listen. How can I support you today?")
 
-    def generate_daily_summary(self, logs):
+    def generate_daily_summary(self, logs, strict=False):
+        if strict and not self.enabled:
+            raise RuntimeError("GEMINI_API_KEY is not configured")
         if not self.enabled or not logs:
             return "Today was a day of varied emotions and experiences."
 
@@ -109,9 +111,17 @@ Write 2–3 sentences:
             return response.text.strip()
 
         except Exception as e:
+            if strict:
+                raise
             print(f"Gemini Summary Error: {e}")
-            dominant = max(set(emotions), key=emotions.count)
-            return f"Today you felt a mix of emotions, with {dominant} being most dominant. You're doing your best, and that's enough."
+            return self.fallback_daily_summary(logs)
+
+    def fallback_daily_summary(self, logs):
+        emotions = [log['emotion_type'] for log in logs]
+        if not emotions:
+            return "Today was a day of varied emotions and experiences."
+        dominant = max(set(emotions), key=emotions.count)
+        return f"Today you felt a mix of emotions, with {dominant} being most dominant. You're doing your best, and that's enough."
 
     def get_relaxation_activities(self, emotion):
         activities = {
@@ -2,18 +2,11 @@ import { useEffect, useState } from 'react';
 import { TrendingUp, Heart, Frown, Zap, Flame, AlertCircle, Wind } from 'lucide-react';
 import { useAuth } from '../../contexts/AuthContext';
 import type { EmotionType } from '../../lib/supabase';
+import { decodeEmotionHistory, type EmotionHistory } from '../../lib/emotionExport';
 
 const BACKEND_URL = 'http://localhost:5000';
-
-interface EmotionStats {
-  emotion_counts: Record<string, number>;
-  total_logs: number;
-  logs: Array<{
-    emotion_type: string;
-    created_at: string;
-    confidence_score: number;
-  }>;
-}
+// the chart only shows totals, so skip the per-point series
+const MAX_POINTS = 0;
 
 const emotionIcons: Record<EmotionType, React.ReactNode> = {
   happiness: <Heart className="w-5 h-5" />,
@@ -34,7 +27,7 @@ const emotionColors: Record<EmotionType, string> = {
 };
 
 export function EmotionChart() {
-  const [stats, setStats] = useState<EmotionStats | null>(null);
+  const [stats, setStats] = useState<EmotionHistory | null>(null);
   const [loading, setLoading] = useState(true);
   const [timeRange, setTimeRange] = useState<7 | 30>(7);
   const { user } = useAuth();
@@ -45,12 +38,11 @@ export function EmotionChart() {
 
       try {
         const response = await fetch(
-          `${BACKEND_URL}/api/emotion-stats?user_id=${user.id}&days=${timeRange}`
+          `${BACKEND_URL}/api/emotion-stats/export?user_id=${user.id}&days=${timeRange}&points=${MAX_POINTS}`
         );
 
         if (response.ok) {
-          const data = await response.json();
-          setStats(data);
+          setStats(decodeEmotionHistory(await response.arrayBuffer()));
         }
       } catch (error) {
         console.error('Error fetching emotion stats:', error);
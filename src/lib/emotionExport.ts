@@ -0,0 +1,64 @@
+// Decoder for the columnar emotion history served by
+// GET /api/emotion-stats/export (layout documented in backend/emotion_export.py).
+
+const MAGIC = 'MCE1';
+const HEADER_SIZE = 24;
+
+export interface EmotionHistory {
+  emotions: string[];
+  emotion_counts: Record<string, number>;
+  total_logs: number;
+  timestamps: Float64Array; // epoch milliseconds per point
+  codes: Uint8Array; // index into `emotions` per point
+  confidences: Float32Array; // 0..1 per point
+}
+
+export function decodeEmotionHistory(buffer: ArrayBuffer): EmotionHistory {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+  if (magic !== MAGIC || view.getUint8(4) !== 1) {
+    throw new Error('Unsupported emotion export format');
+  }
+
+  const labelCount = view.getUint8(5);
+  const pointCount = view.getUint32(8, true);
+  const totalLogs = view.getUint32(12, true);
+  const base = view.getFloat64(16, true);
+
+  let offset = HEADER_SIZE;
+  const counts: number[] = [];
+  for (let i = 0; i < labelCount; i++, offset += 4) {
+    counts.push(view.getUint32(offset, true));
+  }
+
+  const deltasOffset = offset;
+  offset += pointCount * 4;
+  const codes = new Uint8Array(buffer, offset, pointCount);
+  offset += pointCount;
+  const quantized = new Uint8Array(buffer, offset, pointCount);
+  offset += pointCount;
+
+  const decoder = new TextDecoder();
+  const emotions: string[] = [];
+  for (let i = 0; i < labelCount; i++) {
+    const length = view.getUint8(offset);
+    emotions.push(decoder.decode(new Uint8Array(buffer, offset + 1, length)));
+    offset += 1 + length;
+  }
+
+  const timestamps = new Float64Array(pointCount);
+  const confidences = new Float32Array(pointCount);
+  let seconds = base;
+  for (let i = 0; i < pointCount; i++) {
+    seconds += view.getUint32(deltasOffset + i * 4, true);
+    timestamps[i] = seconds * 1000;
+    confidences[i] = quantized[i] / 255;
+  }
+
+  const emotion_counts: Record<string, number> = {};
+  emotions.forEach((emotion, i) => {
+    emotion_counts[emotion] = counts[i];
+  });
+
+  return { emotions, emotion_counts, total_logs: totalLogs, timestamps, codes, confidences };
+}
@@ -0,0 +1,10 @@
+/*
+  # Track when a journal summary was generated
+
+  1. Changes
+    - `journal_entries.summary_generated_at` (timestamptz) - When `mood_summary` was last written.
+      A summary generated after its `entry_date` ended covers the whole day and is served as-is
+      by /api/journal-summary; earlier (partial) summaries are regenerated on request.
+*/
+
+ALTER TABLE journal_entries ADD COLUMN IF NOT EXISTS summary_generated_at timestamptz;
@@ -0,0 +1,29 @@
+/*
+  # Distinct active users per day for the journal scheduler
+
+  1. New Functions
+    - `active_user_ids(day, after_user_id, max_count)` - Distinct `user_id`s with at least one
+      `emotion_logs` row on `day`, ordered by `user_id` and starting after `after_user_id`.
+      Keyset paging on the unique `user_id` avoids scanning every log row in the client and
+      never skips or repeats users between pages.
+
+  2. Security
+    - SECURITY INVOKER, so RLS still applies; the scheduler calls it with the service role key.
+*/
+
+CREATE INDEX IF NOT EXISTS emotion_logs_created_at_user_id_idx ON emotion_logs(created_at, user_id);
+
+CREATE OR REPLACE FUNCTION active_user_ids(day date, after_user_id uuid DEFAULT NULL, max_count integer DEFAULT 1000)
+RETURNS TABLE (user_id uuid)
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+AS $$
+  SELECT DISTINCT l.user_id
+  FROM emotion_logs l
+  WHERE l.created_at >= day
+    AND l.created_at < day + 1
+    AND (after_user_id IS NULL OR l.user_id > after_user_id)
+  ORDER BY l.user_id
+  LIMIT max_count;
+$$;